@@ -1,11 +1,24 @@
+import functools
+import hashlib
+import numpy as np
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import re
-from thefuzz import process, fuzz
+import tempfile
+from rapidfuzz import process, fuzz, utils
 
 # --- Configuration ---
 LINKEDIN_FILE = 'LinkedIn.csv'
 COMPANIES_FILE = 'Companies.csv'
 OUTPUT_FILE = 'potential_leads.csv'
+# The cleaned and filtered company data is cached in this directory between runs
+CACHE_DIR = '.cache'
+
+# Only these columns are loaded from the input files
+LINKEDIN_COLUMNS = ['First Name', 'Last Name', 'URL', 'Email Address', 'Company', 'Position', 'Connected On']
+COMPANIES_COLUMNS = ['Company Name', 'Market Capitalization']
 
 MIN_MARKET_CAP_USD = 50_000_000  # $50 Million
 MAX_MARKET_CAP_USD = 100_000_000 # $100 Million
@@ -49,236 +62,384 @@ MIN_SENIORITY_SCORE = 60   # Minimum score required to include contact (e.g., 60
 
 # --- Helper Functions ---
 
-def clean_market_cap(value):
-    """Converts market cap strings (e.g., '$55.3M', '98B') to numeric USD."""
-    if pd.isna(value):
+# Version of the cached company data; bump it whenever the cleaning logic changes
+# (clean_market_cap, preprocess_company_name, sort_name_tokens) so stale caches are not reused
+_COMPANIES_CACHE_VERSION = 2
+
+# Patterns used by preprocess_company_name, compiled once at module load
+_SUFFIX_RE = re.compile(r'\b(?:inc|llc|ltd|corp|corporation|plc|gmbh|ag|co)\b\.?\s*$')
+_PUNCT_RE = re.compile(r'[^\w\s]+')
+_WS_RE = re.compile(r'\s+')
+
+# Characters 128-255 (e.g., accented letters) that are dropped before fuzzy matching,
+# as thefuzz's default processor did
+_NON_ASCII_LATIN1 = {i: None for i in range(128, 256)}
+
+def read_csv_columns(path, columns):
+    """Loads the given columns (those present in the file) as strings with the pyarrow CSV parser."""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in columns if col in header]
+    # All used columns are text; without an explicit dtype a column that is blank in every row
+    # would load as a null column that the .str accessor rejects
+    dtype = {col: 'string[pyarrow]' for col in usecols}
+    try:
+        return pd.read_csv(path, engine='pyarrow', dtype=dtype, usecols=usecols)
+    except (pa.ArrowInvalid, pd.errors.ParserError):
+        # The pyarrow parser rejects rows with missing trailing fields, fall back to the
+        # default parser which fills them with NaN
+        return pd.read_csv(path, dtype=dtype, usecols=usecols)
+
+def clean_market_cap(values):
+    """Converts a Series of market cap strings (e.g., '$55.3M', '98B') to numeric USD."""
+    cleaned = values.astype(str).str.upper().str.replace(r'[\$,\s]', '', regex=True)
+    # Scale by the B/M suffix, assume it's already in dollars if there is neither
+    multiplier = np.where(cleaned.str.endswith('B'), 1_000_000_000,
+                          np.where(cleaned.str.endswith('M'), 1_000_000, 1))
+    return pd.to_numeric(cleaned.str.rstrip('BM'), errors='coerce') * multiplier
+
+def preprocess_company_name(names):
+    """Cleans a Series of company names for better fuzzy matching."""
+    return (
+        names.fillna('').astype(str).str.lower()
+        .str.replace(_SUFFIX_RE, '', regex=True) # Remove common suffixes
+        .str.replace(_PUNCT_RE, '', regex=True)  # Remove punctuation
+        .str.replace(_WS_RE, ' ', regex=True)    # Remove extra whitespace
+        .str.strip()
+    )
+
+def sort_name_tokens(names):
+    """Prepares cleaned names for fuzzy matching the way thefuzz's token_sort_ratio did: drops
+    accented Latin-1 characters, keeps only letters and numbers, and sorts the words."""
+    return [' '.join(sorted(utils.default_process(name.translate(_NON_ASCII_LATIN1)).split())) for name in names]
+
+@functools.lru_cache(maxsize=8)
+def _compile_keywords(seniority_items, negative_items):
+    """Builds the keyword pattern and per-keyword score arrays used by assign_seniority_score.
+    Takes the keyword dicts as tuples of items so the result can be cached per keyword set."""
+    seniority_keywords, negative_keywords = dict(seniority_items), dict(negative_items)
+    # All keywords go in a single alternation, so each title is scanned once. It is wrapped in a
+    # lookahead so overlapping keywords are also found (e.g., 'president' inside 'vice president'),
+    # and the longest (most specific) keyword wins when several start at the same position.
+    # Positive keywords use word boundaries to avoid partial matches (e.g., 'cto' in 'director');
+    # negative keywords match anywhere in the title.
+    keywords = sorted({**seniority_keywords, **negative_keywords}, key=len, reverse=True)
+    pattern = re.compile(r'(?=(' + '|'.join(
+        r'\b' + re.escape(k) + r'\b' if k in seniority_keywords else re.escape(k)
+        for k in keywords
+    ) + r'))' if keywords else r'(?!)') # No keywords: a pattern that never matches
+    # Keyword ids and their positive/negative scores, indexed by id
+    keyword_ids = {k: i for i, k in enumerate(keywords)}
+    positive_scores = np.array([seniority_keywords.get(k, 0) for k in keywords], dtype=int)
+    negative_scores = np.array([negative_keywords.get(k, 0) for k in keywords], dtype=int)
+    return pattern, keyword_ids, positive_scores, negative_scores
+
+def assign_seniority_score(titles, seniority_keywords=None, negative_keywords=None):
+    """Assigns a score to each job title in a Series based on its keywords.
+    The keyword dicts default to SENIORITY_KEYWORDS and NEGATIVE_KEYWORDS as they are at call time."""
+    pattern, keyword_ids, positive_scores, negative_scores = _compile_keywords(
+        tuple((SENIORITY_KEYWORDS if seniority_keywords is None else seniority_keywords).items()),
+        tuple((NEGATIVE_KEYWORDS if negative_keywords is None else negative_keywords).items()),
+    )
+    keyword_hits = titles.fillna('').str.lower().str.findall(pattern).tolist()
+
+    # Flatten the keyword ids found in all titles into one array, with the title each came from
+    hit_counts = np.array([len(hits) for hits in keyword_hits], dtype=np.intp)
+    hit_ids = np.fromiter((keyword_ids[k] for hits in keyword_hits for k in hits), dtype=np.intp, count=hit_counts.sum())
+    hit_rows = np.repeat(np.arange(len(keyword_hits)), hit_counts)
+
+    # Sum the penalties of the negative keywords found (each counted once per title)
+    unique_hits = np.unique(hit_rows * len(keyword_ids) + hit_ids)
+    penalty = np.zeros(len(keyword_hits), dtype=int)
+    np.add.at(penalty, unique_hits // len(keyword_ids), negative_scores[unique_hits % len(keyword_ids)])
+
+    # Find the highest score from positive keywords
+    highest_positive_score = np.zeros(len(keyword_hits), dtype=int)
+    np.maximum.at(highest_positive_score, hit_rows, positive_scores[hit_ids])
+
+    # Only add positive score if not strongly negated (e.g., 'former ceo')
+    # Allow minor penalties like 'assistant to'
+    score = np.where(penalty > -50, penalty + highest_positive_score, penalty)
+
+    # Ensure score is not negative unless strongly negated
+    score = np.where(score < -50, score, np.maximum(score, 0))
+    return pd.Series(score, index=titles.index)
+
+
+# --- Pipeline Stages ---
+
+def load_data(linkedin_file=LINKEDIN_FILE):
+    """Loads the LinkedIn connections. Returns None if the file can't be loaded."""
+    try:
+        print(f"Loading LinkedIn connections from {linkedin_file}...")
+        df_linkedin = read_csv_columns(linkedin_file, LINKEDIN_COLUMNS)
+        print(f"Loaded {len(df_linkedin)} connections.")
+    except FileNotFoundError:
+        print(f"Error: LinkedIn file not found at {linkedin_file}")
         return None
-    value = str(value).strip().upper().replace('$', '').replace(',', '')
-    if 'B' in value:
-        num = value.replace('B', '')
-        try:
-            return float(num) * 1_000_000_000
-        except ValueError:
-            return None
-    elif 'M' in value:
-        num = value.replace('M', '')
+    except Exception as e:
+        print(f"Error loading LinkedIn file: {e}")
+        return None
+    return df_linkedin
+
+def filter_companies(companies_file=COMPANIES_FILE, min_market_cap_usd=MIN_MARKET_CAP_USD,
+                     max_market_cap_usd=MAX_MARKET_CAP_USD, cache_dir=CACHE_DIR):
+    """Loads, cleans and filters the companies by market cap, preparing their names for matching.
+    Returns None if there are no companies to match against."""
+    # The prepared company data only depends on the Companies file, the market cap range and the
+    # cleaning logic, so it is reused from the cache until any of them changes
+    try:
+        companies_stat = os.stat(companies_file)
+        cache_key = hashlib.sha1(repr((
+            _COMPANIES_CACHE_VERSION,
+            os.path.abspath(companies_file),
+            companies_stat.st_size,
+            companies_stat.st_mtime_ns,
+            min_market_cap_usd,
+            max_market_cap_usd,
+        )).encode()).hexdigest()[:16]
+        companies_cache_file = os.path.join(cache_dir, f"companies_{cache_key}.parquet")
+    except FileNotFoundError:
+        print(f"Error: Companies file not found at {companies_file}")
+        return None
+
+    if os.path.exists(companies_cache_file):
+        print(f"Loading cleaned company data from {companies_cache_file}...")
         try:
-            return float(num) * 1_000_000
-        except ValueError:
-            return None
+            df_companies_filtered = pd.read_parquet(companies_cache_file)
+        except Exception as e:
+            print(f"Warning: could not read cached company data, rebuilding it: {e}")
+        else:
+            print(f"Found {len(df_companies_filtered)} companies in the target market cap range.")
+            return df_companies_filtered
+
     try:
-        # Assume it's already in dollars if no M or B
-        return float(value)
-    except ValueError:
+        print(f"Loading company data from {companies_file}...")
+        df_companies = read_csv_columns(companies_file, COMPANIES_COLUMNS)
+        print(f"Loaded {len(df_companies)} companies.")
+    except FileNotFoundError:
+        print(f"Error: Companies file not found at {companies_file}")
+        return None
+    except Exception as e:
+        print(f"Error loading Companies file: {e}")
         return None
 
-def preprocess_company_name(name):
-    """Cleans company names for better fuzzy matching."""
-    if pd.isna(name):
-        return ""
-    name = str(name).lower()
-    # Remove common suffixes
-    name = re.sub(r'\b(inc|llc|ltd|corp|corporation|plc|gmbh|ag|co)\b\.?$', '', name).strip()
-    # Remove punctuation
-    name = re.sub(r'[^\w\s]', '', name)
-    # Remove extra whitespace
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name
-
-def assign_seniority_score(title):
-    """Assigns a score based on keywords in the job title."""
-    if pd.isna(title):
-        return 0
-    
-    title_lower = title.lower()
-    score = 0
-    
-    # Check for negative keywords first
-    for keyword, penalty in NEGATIVE_KEYWORDS.items():
-        if keyword in title_lower:
-            score += penalty # Apply penalty
+    print("Cleaning and filtering company data by market cap...")
+    # Ensure required columns exist
+    required_company_cols = ['Company Name', 'Market Capitalization']
+    if not all(col in df_companies.columns for col in required_company_cols):
+        print(f"Error: Companies file must contain columns: {required_company_cols}")
+        return None
 
-    # Find the highest score from positive keywords
-    highest_positive_score = 0
-    for keyword, value in SENIORITY_KEYWORDS.items():
-        # Use word boundaries to avoid partial matches (e.g., 'manager' in 'account manager')
-        if re.search(r'\b' + re.escape(keyword) + r'\b', title_lower):
-            highest_positive_score = max(highest_positive_score, value)
+    df_companies['Market Cap (USD)'] = clean_market_cap(df_companies['Market Capitalization'])
+    df_companies_filtered = df_companies[
+        df_companies['Market Cap (USD)'].between(min_market_cap_usd, max_market_cap_usd, inclusive='both')
+    ].copy() # Use .copy() to avoid SettingWithCopyWarning
 
-    # Only add positive score if not strongly negated (e.g., 'former ceo')
-    if score > -50: # Allow minor penalties like 'assistant to'
-         score += highest_positive_score
-    
-    # Ensure score is not negative unless strongly negated
-    return max(score, 0) if score >= -50 else score
+    if df_companies_filtered.empty:
+        print("No companies found within the specified market cap range.")
+        return None
 
+    print(f"Found {len(df_companies_filtered)} companies in the target market cap range.")
 
-# --- Main Script ---
+    # Prepare target company names for matching
+    df_companies_filtered['Clean Company Name'] = preprocess_company_name(df_companies_filtered['Company Name'])
+    df_companies_filtered['Sorted Company Name'] = sort_name_tokens(df_companies_filtered['Clean Company Name'])
 
-print("Starting lead generation process...")
-
-# 1. Load Data
-try:
-    print(f"Loading LinkedIn connections from {LINKEDIN_FILE}...")
-    df_linkedin = pd.read_csv(LINKEDIN_FILE)
-    print(f"Loaded {len(df_linkedin)} connections.")
-except FileNotFoundError:
-    print(f"Error: LinkedIn file not found at {LINKEDIN_FILE}")
-    exit()
-except Exception as e:
-    print(f"Error loading LinkedIn file: {e}")
-    exit()
-
-try:
-    print(f"Loading company data from {COMPANIES_FILE}...")
-    df_companies = pd.read_csv(COMPANIES_FILE)
-    print(f"Loaded {len(df_companies)} companies.")
-except FileNotFoundError:
-    print(f"Error: Companies file not found at {COMPANIES_FILE}")
-    exit()
-except Exception as e:
-    print(f"Error loading Companies file: {e}")
-    exit()
-
-# 2. Clean and Filter Companies by Market Cap
-print("Cleaning and filtering company data by market cap...")
-# Ensure required columns exist
-required_company_cols = ['Company Name', 'Market Capitalization']
-if not all(col in df_companies.columns for col in required_company_cols):
-    print(f"Error: Companies file must contain columns: {required_company_cols}")
-    exit()
-
-df_companies['Market Cap (USD)'] = df_companies['Market Capitalization'].apply(clean_market_cap)
-df_companies_filtered = df_companies[
-    (df_companies['Market Cap (USD)'] >= MIN_MARKET_CAP_USD) &
-    (df_companies['Market Cap (USD)'] <= MAX_MARKET_CAP_USD)
-].copy() # Use .copy() to avoid SettingWithCopyWarning
-
-if df_companies_filtered.empty:
-    print("No companies found within the specified market cap range.")
-    exit()
-
-print(f"Found {len(df_companies_filtered)} companies in the target market cap range.")
-
-# Prepare target company names for matching
-df_companies_filtered['Clean Company Name'] = df_companies_filtered['Company Name'].apply(preprocess_company_name)
-target_company_names = df_companies_filtered['Clean Company Name'].tolist()
-target_company_map = df_companies_filtered.set_index('Clean Company Name')['Company Name'].to_dict() # Map clean name back to original
-market_cap_map = df_companies_filtered.set_index('Clean Company Name')['Market Cap (USD)'].to_dict()
-
-
-# 3. Match LinkedIn Connections to Target Companies
-print("Matching LinkedIn connections to target companies (this may take a moment)...")
-# Ensure required LinkedIn columns exist
-required_linkedin_cols = ['Company', 'Position', 'First Name', 'Last Name']
-if not all(col in df_linkedin.columns for col in required_linkedin_cols):
-    print(f"Error: LinkedIn file must contain columns: {required_linkedin_cols}")
-    exit()
-
-matched_connections = []
-df_linkedin['Clean Company'] = df_linkedin['Company'].apply(preprocess_company_name)
-
-# Create a cache for fuzzy matching results to speed up
-fuzzy_match_cache = {}
-
-for index, row in df_linkedin.iterrows():
-    if not row['Clean Company']:
-        continue
-
-    # Check cache first
-    if row['Clean Company'] in fuzzy_match_cache:
-         best_match, score = fuzzy_match_cache[row['Clean Company']]
-    else:
-        # Find the best fuzzy match among target companies
-        match_result = process.extractOne(
-            row['Clean Company'],
-            target_company_names,
-            scorer=fuzz.token_sort_ratio # Good for matching names with different word order
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file and move it into place, so an interrupted run can't leave
+        # a truncated cache file behind
+        fd, temp_cache_file = tempfile.mkstemp(dir=cache_dir, suffix='.parquet.tmp')
+        os.close(fd)
+        try:
+            df_companies_filtered.to_parquet(temp_cache_file, index=False)
+            os.replace(temp_cache_file, companies_cache_file)
+        finally:
+            if os.path.exists(temp_cache_file):
+                os.remove(temp_cache_file)
+    except Exception as e:
+        print(f"Warning: could not cache company data to {companies_cache_file}: {e}")
+
+    return df_companies_filtered
+
+def match(df_linkedin, df_companies_filtered, fuzzy_match_threshold=FUZZY_MATCH_THRESHOLD):
+    """Matches connections to the target companies by company name.
+    Returns None if no connection matches."""
+    print("Matching LinkedIn connections to target companies (this may take a moment)...")
+    # Ensure required LinkedIn columns exist
+    required_linkedin_cols = ['Company', 'Position', 'First Name', 'Last Name']
+    if not all(col in df_linkedin.columns for col in required_linkedin_cols):
+        print(f"Error: LinkedIn file must contain columns: {required_linkedin_cols}")
+        return None
+
+    df_linkedin = df_linkedin.copy()
+    df_linkedin['Clean Company'] = preprocess_company_name(df_linkedin['Company'])
+    # Drop connections without a company before any matching work
+    df_linkedin = df_linkedin[df_linkedin['Clean Company'] != ''].reset_index(drop=True)
+    # Employers repeat across connections, so store the cleaned names as a categorical
+    df_linkedin['Clean Company'] = df_linkedin['Clean Company'].astype('category')
+
+    # Match each distinct LinkedIn company rather than every row; connections often share employers.
+    # Names are compared by their sorted words (token sort), which handles different word order;
+    # sorting is done once per name up front rather than inside every comparison.
+    unique_companies = pd.unique(df_linkedin['Clean Company'])
+    unique_sorted_names = sort_name_tokens(unique_companies)
+    target_sorted_names = df_companies_filtered['Sorted Company Name'].tolist()
+
+    # Fast path: a company whose sorted name equals a target's is a perfect match, found with a
+    # dict lookup (the first target wins, as with argmax below)
+    exact_lookup = {name: i for i, name in reversed(list(enumerate(target_sorted_names)))}
+    best_idx = np.array([exact_lookup.get(name, -1) for name in unique_sorted_names], dtype=np.intp)
+    best_score = np.where(best_idx >= 0, 100, 0).astype(np.uint8)
+
+    # Fuzzy-score the remaining companies against every target company in one batch call,
+    # producing an (N_remaining x N_targets) score matrix, then take the best target per company.
+    remaining = np.flatnonzero(best_idx < 0)
+    if len(remaining):
+        scores = process.cdist(
+            [unique_sorted_names[i] for i in remaining],
+            target_sorted_names,
+            scorer=fuzz.ratio,
+            processor=None, # Names are already cleaned and sorted
+            # Scores are rounded to whole numbers before comparing with the threshold, so pairs that
+            # can't round up to it are skipped early and score 0
+            score_cutoff=max(fuzzy_match_threshold - 0.5, 0),
+            workers=-1, # Use all CPU cores
+            dtype=np.float32
         )
-        if match_result:
-            best_match, score = match_result
-            fuzzy_match_cache[row['Clean Company']] = (best_match, score) # Store in cache
-        else:
-            best_match, score = None, 0
-            fuzzy_match_cache[row['Clean Company']] = (None, 0) # Cache miss
-
-
-    if best_match and score >= FUZZY_MATCH_THRESHOLD:
-        connection_data = row.to_dict()
-        connection_data['Matched Company Name'] = target_company_map[best_match] # Get original name
-        connection_data['Matched Market Cap (USD)'] = market_cap_map[best_match]
-        connection_data['Match Score'] = score
-        matched_connections.append(connection_data)
-
-if not matched_connections:
-    print("No connections found working at companies in the target market cap range after matching.")
-    exit()
-
-df_matched = pd.DataFrame(matched_connections)
-print(f"Found {len(df_matched)} potential connections after company matching.")
-
-# 4. Rank Seniority
-print("Ranking connections by seniority based on job titles...")
-df_matched['Seniority Score'] = df_matched['Position'].apply(assign_seniority_score)
-
-# Filter out potentially former employees or very low ranks if score is negative
-df_matched = df_matched[df_matched['Seniority Score'] >= 0]
-
-if df_matched.empty:
-    print("No suitable connections found after seniority scoring.")
-    exit()
-
-# 5. Filter Connections by Minimum Seniority Threshold
-print(f"Filtering connections to include only those with seniority score >= {MIN_SENIORITY_SCORE}...")
-# Sort by company and then descending seniority score for organized output
-df_matched_sorted = df_matched.sort_values(by=['Matched Company Name', 'Seniority Score'], ascending=[True, False])
-
-# *** MODIFIED LOGIC HERE ***
-# Filter connections based on the minimum seniority score threshold
-df_potential_contacts = df_matched_sorted[df_matched_sorted['Seniority Score'] >= MIN_SENIORITY_SCORE].copy()
-
-if df_potential_contacts.empty:
-    print(f"No connections found meeting the minimum seniority score of {MIN_SENIORITY_SCORE}.")
-    exit()
-
-print(f"Identified {len(df_potential_contacts)} contacts meeting the seniority threshold.")
-
-# 6. Prepare and Save Output
-print(f"Preparing final list and saving to {OUTPUT_FILE}...")
-# Select and order columns for the final output
-output_columns = [
-    'First Name',
-    'Last Name',
-    'Position',
-    'Seniority Score',
-    'Company', # Original company name from LinkedIn
-    'Matched Company Name', # Official matched company name
-    'Matched Market Cap (USD)',
-    'URL', # LinkedIn Profile URL
-    'Email Address',
-    'Connected On'
-]
-# Ensure all desired output columns exist in the dataframe, add missing ones with None
-for col in output_columns:
-    if col not in df_potential_contacts.columns:
-        df_potential_contacts[col] = None
-
-df_final_output = df_potential_contacts[output_columns] # Already sorted by company and score
-
-
-# Format Market Cap for readability
-df_final_output['Matched Market Cap (USD)'] = df_final_output['Matched Market Cap (USD)'].apply(lambda x: f"${x:,.0f}" if pd.notna(x) else 'N/A')
-
-
-try:
-    df_final_output.to_csv(OUTPUT_FILE, index=False)
-    print(f"Successfully saved potential leads to {OUTPUT_FILE}")
-    # Display the first few results
-    print("\n--- Top Potential Leads ---")
-    print(df_final_output.head().to_string())
-    print("---------------------------\n")
-
-except Exception as e:
-    print(f"Error saving output file: {e}")
-
-print("Script finished.")
+        # Pick the highest unrounded score, then round it half to even like Python's round(),
+        # which thefuzz used for its integer scores
+        best_idx[remaining] = scores.argmax(axis=1)
+        best_score[remaining] = np.rint(scores[np.arange(len(remaining)), best_idx[remaining]])
+
+    best_matches = pd.DataFrame({
+        'Clean Company': unique_companies,
+        'Best Match Index': best_idx.astype(np.int32),
+        'Match Score': best_score,
+    })
+    # Join the per-company results back onto every connection
+    df_linkedin = df_linkedin.merge(best_matches, on='Clean Company', how='left')
+
+    match_mask = df_linkedin['Match Score'] >= fuzzy_match_threshold
+    if not match_mask.any():
+        print("No connections found working at companies in the target market cap range after matching.")
+        return None
+
+    df_matched = df_linkedin.loc[match_mask].copy()
+    # Take the name and market cap from the same target row. When several targets clean to the
+    # same name, the last of them is used, as the original clean-name lookup did.
+    clean_names = df_companies_filtered['Clean Company Name'].tolist()
+    last_row_by_name = dict(zip(clean_names, range(len(clean_names)))) # Later rows overwrite earlier ones
+    last_row = np.array([last_row_by_name[name] for name in clean_names], dtype=np.intp)
+    matched_targets = df_companies_filtered.iloc[last_row[df_matched['Best Match Index'].to_numpy()]]
+    # Original name, as a categorical since many connections share a company (also makes sorting by it cheaper)
+    df_matched['Matched Company Name'] = pd.Categorical(matched_targets['Company Name'].to_numpy())
+    df_matched['Matched Market Cap (USD)'] = matched_targets['Market Cap (USD)'].to_numpy()
+    print(f"Found {len(df_matched)} potential connections after company matching.")
+    return df_matched
+
+def score_titles(df_matched, min_seniority_score=MIN_SENIORITY_SCORE,
+                 seniority_keywords=None, negative_keywords=None):
+    """Ranks matched connections by seniority and keeps those meeting the minimum score, sorted by
+    company and then seniority. Returns None if no connection qualifies.
+    The keyword dicts default to SENIORITY_KEYWORDS and NEGATIVE_KEYWORDS as they are at call time."""
+    print("Ranking connections by seniority based on job titles...")
+    # Connections without a job title can't be ranked
+    df_matched = df_matched[df_matched['Position'].notna()].copy()
+    # Job titles repeat a lot across connections, so each distinct title is scored only once
+    unique_titles = pd.Series(df_matched['Position'].unique())
+    title_scores = dict(zip(unique_titles, assign_seniority_score(unique_titles, seniority_keywords, negative_keywords)))
+    df_matched['Seniority Score'] = df_matched['Position'].map(title_scores).astype(np.int16) # Small ints, store compactly
+
+    # Filter out potentially former employees or very low ranks if score is negative
+    df_matched = df_matched[df_matched['Seniority Score'] >= 0]
+
+    if df_matched.empty:
+        print("No suitable connections found after seniority scoring.")
+        return None
+
+    print(f"Filtering connections to include only those with seniority score >= {min_seniority_score}...")
+    # Filter connections based on the minimum seniority score threshold first, so only those are sorted,
+    # then sort by company and then descending seniority score for organized output
+    df_potential_contacts = df_matched.loc[df_matched['Seniority Score'] >= min_seniority_score].sort_values(
+        by=['Matched Company Name', 'Seniority Score'], ascending=[True, False], kind='mergesort'
+    )
+
+    if df_potential_contacts.empty:
+        print(f"No connections found meeting the minimum seniority score of {min_seniority_score}.")
+        return None
+
+    print(f"Identified {len(df_potential_contacts)} contacts meeting the seniority threshold.")
+    return df_potential_contacts
+
+def write_output(df_potential_contacts, output_file=OUTPUT_FILE):
+    """Saves the selected output columns of the potential contacts to a CSV file."""
+    print(f"Preparing final list and saving to {output_file}...")
+    # Select and order columns for the final output
+    output_columns = [
+        'First Name',
+        'Last Name',
+        'Position',
+        'Seniority Score',
+        'Company', # Original company name from LinkedIn
+        'Matched Company Name', # Official matched company name
+        'Matched Market Cap (USD)',
+        'URL', # LinkedIn Profile URL
+        'Email Address',
+        'Connected On'
+    ]
+    # Ensure all desired output columns exist in the dataframe, missing ones are added empty
+    df_final_output = df_potential_contacts.reindex(columns=output_columns) # Already sorted by company and score
+
+    # Format Market Cap for readability
+    market_cap = df_final_output['Matched Market Cap (USD)']
+    has_market_cap = market_cap.notna()
+    formatted_market_cap = pd.Series('N/A', index=market_cap.index)
+    formatted_market_cap[has_market_cap] = '$' + market_cap[has_market_cap].round().astype('int64').map('{:,}'.format)
+    df_final_output['Matched Market Cap (USD)'] = formatted_market_cap
+
+    try:
+        pacsv.write_csv(pa.Table.from_pandas(df_final_output, preserve_index=False), output_file)
+        print(f"Successfully saved potential leads to {output_file}")
+        # Display the first few results
+        print("\n--- Top Potential Leads ---")
+        print(df_final_output.head().to_string())
+        print("---------------------------\n")
+
+    except Exception as e:
+        print(f"Error saving output file: {e}")
+
+
+# --- Main Script ---
+
+def main():
+    print("Starting lead generation process...")
+
+    # 1. Load Data
+    df_linkedin = load_data()
+    if df_linkedin is None:
+        return
+
+    # 2. Clean and Filter Companies by Market Cap
+    df_companies_filtered = filter_companies()
+    if df_companies_filtered is None:
+        return
+
+    # 3. Match LinkedIn Connections to Target Companies
+    df_matched = match(df_linkedin, df_companies_filtered)
+    if df_matched is None:
+        return
+
+    # 4. Rank Seniority and 5. Filter Connections by Minimum Seniority Threshold
+    df_potential_contacts = score_titles(df_matched)
+    if df_potential_contacts is None:
+        return
+
+    # 6. Prepare and Save Output
+    write_output(df_potential_contacts)
+
+    print("Script finished.")
+
+
+if __name__ == '__main__':
+    main()